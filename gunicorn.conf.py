@@ -1,14 +1,56 @@
 # Gunicorn configuration file for Novak Trading Engine
 import os
+import sys
 import multiprocessing
 
 # Server socket
 bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
 
+def available_memory_mb():
+    """Memory available for new workers in MB, honouring a cgroup v2 limit if set"""
+    available = None
+    try:
+        # MemAvailable counts reclaimable page cache, MemFree (SC_AVPHYS_PAGES) does not
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError):
+        pass
+    if available is None:
+        available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            with open('/sys/fs/cgroup/memory.current') as f:
+                usage = int(f.read())
+            # memory.current includes page cache; leave out the reclaimable part like docker stats does
+            with open('/sys/fs/cgroup/memory.stat') as f:
+                for line in f:
+                    if line.startswith('inactive_file '):
+                        usage -= int(line.split()[1])
+                        break
+            available = min(available, max(0, int(limit) - usage))
+    except (OSError, ValueError):
+        pass
+    return available // (1024 * 1024)
+
 # Worker processes - Use single worker to avoid memory issues with trading bots
 # Trading bots use background threads, so we don't need multiple workers
-workers = 1  # Changed from multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# GUNICORN_WORKERS can raise this, but never past what the CPUs or the available memory can support
+# GUNICORN_WORKER_MB=0 turns the memory cap off
+worker_limits = [int(os.environ.get('GUNICORN_WORKERS', 1)), multiprocessing.cpu_count() * 2 + 1]
+worker_memory_mb = int(os.environ.get('GUNICORN_WORKER_MB', 300))
+if worker_memory_mb > 0:
+    worker_limits.append(available_memory_mb() // worker_memory_mb)
+workers = max(1, min(worker_limits))
+# Threaded worker so one slow MT5 round-trip doesn't block every other request
+worker_class = "gthread"
+# Requests handled concurrently per worker = threads; worker_connections only caps how many
+# client connections (including idle keep-alive ones) a gthread worker holds open at once
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
 worker_connections = 1000
 
 # Remove max_requests to prevent worker restarts that lose trading bot instances
@@ -24,14 +66,9 @@ graceful_timeout = 30
 loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
 
-# Log to both files and stdout/stderr for docker logs compatibility
-accesslog = '/app/logs/gunicorn_access.log'
-errorlog = '/app/logs/gunicorn_error.log'
-
-# Also log to stdout/stderr for docker logs (set to '-' means stdout)
-# You can comment out the lines below if you only want file logging
-# accesslog = '-'  # This would log access to stdout
-# errorlog = '-'   # This would log errors to stderr
+# Log to stdout/stderr and let the container runtime's log driver collect them
+accesslog = '-'
+errorlog = '-'
 
 capture_output = True
 
@@ -57,13 +94,16 @@ wsgi_module = "wsgi:app"
 pythonpath = "/app"
 
 # Preload application for better performance
+# Anything opened at import time (MongoDB client, MT5/RPyC connection, HTTP sessions) is
+# inherited by every forked worker, so those globals must be created lazily or rebuilt
+# in the app's reinit_connections() hook, which post_fork calls in each worker
 preload_app = True
 
 # Worker settings for trading operations
 worker_tmp_dir = "/dev/shm"  # Use memory for temporary files
 
 def on_starting(server):
-    server.log.info("Starting Novak Trading Engine with Gunicorn")
+    server.log.info("Starting Novak Trading Engine with Gunicorn (%s workers)", server.cfg.workers)
 
 def on_reload(server):
     server.log.info("Reloading Novak Trading Engine")
@@ -76,6 +116,12 @@ def pre_fork(server, worker):
 
 def post_fork(server, worker):
     server.log.info("Worker spawned (pid: %s)", worker.pid)
+    # Give the worker its own connections instead of sockets shared with the master
+    app_module = sys.modules.get("src.app")
+    reinit_connections = getattr(app_module, "reinit_connections", None)
+    if callable(reinit_connections):
+        reinit_connections()
+        worker.log.info("Connections reinitialized in worker (pid: %s)", worker.pid)
 
 def when_ready(server):
     server.log.info("Novak Trading Engine ready to accept connections")
@@ -3,50 +3,183 @@
 MT5 Container Manager Script
 
 This script manages the MT5 container lifecycle:
-- Automatic restart every 12 hours
+- Automatic restart every 12 hours (MT5_RESTART_INTERVAL_HOURS, 0 disables)
 - Health monitoring and automatic recovery
-- Container restart on demand
+- Container restart on demand (--restart-now, or SIGUSR1 to the running daemon)
 - Works both from host system and inside Docker containers
 """
 
-import subprocess
 import time
 import logging
+import logging.handlers
+import queue
 import os
 import sys
-import argparse
-import requests
+import signal
+import selectors
 import socket
-from datetime import datetime, timedelta
-from typing import Optional
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/mt5_container_manager.log'),
-        logging.StreamHandler()
-    ]
-)
+import json
+import threading
+import http.client
+import urllib.parse
+import functools
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from datetime import datetime
 
+LOG_FILE = '/var/log/mt5_container_manager.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+STATE_FILE = '/var/lib/mt5_container_manager/state.json'
+
+def _configure_logging(level=logging.INFO, logfile=None):
+    """Setup logging so file and console writes happen on a background thread"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if logfile:
+        # Keep at most ~40MB of logs on disk
+        handlers.append(logging.handlers.RotatingFileHandler(logfile, maxBytes=10_000_000, backupCount=3))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    # Log calls only enqueue the record, the listener thread does the blocking I/O
+    log_queue = queue.Queue(-1)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    return listener
+
+@functools.lru_cache(maxsize=1)
 def is_running_in_docker():
     """Check if the script is running inside a Docker container"""
     try:
-        # Check for .dockerenv file
+        # Check for .dockerenv file, then cgroup for docker (read as bytes, no locale decoding)
         if os.path.exists('/.dockerenv'):
             return True
-        
-        # Check cgroup for docker
-        with open('/proc/1/cgroup', 'r') as f:
-            content = f.read()
-            if 'docker' in content or 'containerd' in content:
-                return True
-                
-        return False
-    except:
+        content = Path('/proc/1/cgroup').read_bytes()
+        return b'docker' in content or b'containerd' in content
+    except OSError:
         return False
 
+DOCKER_SOCKET = '/var/run/docker.sock'
+
+# Commands sent to the monitor loop over its wake-up socket
+WAKE_STOP = b'S'
+WAKE_RESTART = b'R'
+
+# Seconds between events stream reconnects at most, and failed reconnects before probing directly
+EVENTS_MAX_BACKOFF = 30
+EVENTS_PROBE_AFTER = 3
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+
+    def __init__(self, socket_path, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+class DockerAPI:
+    """Minimal Docker Engine API client keeping one connection open to the daemon socket"""
+
+    def __init__(self, socket_path=None, timeout=30):
+        if socket_path is None:
+            docker_host = os.environ.get('DOCKER_HOST', '')
+            if docker_host.startswith('unix://'):
+                socket_path = docker_host[len('unix://'):]
+            else:
+                socket_path = DOCKER_SOCKET
+        self.socket_path = socket_path
+        self._conn = UnixHTTPConnection(socket_path, timeout=timeout)
+        self._lock = threading.Lock()
+
+    def request(self, method, path, params=None, body=None):
+        """Send a request to the Docker daemon and return (status, decoded body)"""
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._conn.request(method, path, body=payload, headers=headers)
+                    response = self._conn.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    # The daemon dropped the idle keep-alive connection, reconnect once
+                    self._conn.close()
+                    if attempt:
+                        raise
+                except Exception:
+                    self._conn.close()
+                    raise
+
+        if data and response.getheader('Content-Type', '').startswith('application/json'):
+            try:
+                return response.status, json.loads(data)
+            except ValueError:
+                # Progress endpoints such as image pulls return one JSON document per line
+                return response.status, [json.loads(line) for line in data.splitlines() if line.strip()]
+        return response.status, data.decode(errors='replace')
+
+    def get(self, path, params=None):
+        return self.request('GET', path, params=params)
+
+    def post(self, path, params=None, body=None):
+        return self.request('POST', path, params=params, body=body)
+
+    def delete(self, path, params=None):
+        return self.request('DELETE', path, params=params)
+
+    def events(self, filters=None, since=None):
+        """Yield decoded events from the daemon's streaming /events endpoint"""
+        params = {}
+        if filters:
+            params['filters'] = json.dumps(filters)
+        if since is not None:
+            # The daemon replays events from this point before streaming new ones
+            params['since'] = since
+        path = '/events'
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+
+        # The stream stays open indefinitely, so it gets its own connection without a timeout
+        conn = UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            if response.status != 200:
+                raise ConnectionError(f"Docker events request failed with status {response.status}")
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+def parse_docker_time(value):
+    """Parse a Docker API timestamp (UTC, nanosecond precision) into an aware datetime"""
+    seconds, _, fraction = value.rstrip('Z').partition('.')
+    return datetime.fromisoformat(f"{seconds}.{fraction[:6].ljust(6, '0')}+00:00")
+
+def docker_error(data):
+    """Extract the error message from a Docker API response body"""
+    if isinstance(data, dict):
+        return data.get('message', str(data))
+    return str(data).strip()
+
 class MT5ContainerManager:
     def __init__(self):
         """Initialize the MT5 container manager"""
@@ -54,10 +187,36 @@ class MT5ContainerManager:
         self.mt5_image = os.environ.get('MT5_IMAGE', 'gmag11/metatrader5_vnc')
         self.mt5_port = os.environ.get('MT5_PORT', '8002')
         self.mt5_host = os.environ.get('MT5_HOST', 'localhost')
-        self.restart_interval = 12 * 3600  # 12 hours in seconds
+        # Bind mount source for new containers, fixed to the directory the manager started in
+        self.mt5_data_path = os.path.abspath('mt5_data')
+        self.trading_engine_url = os.environ.get('TRADING_ENGINE_URL', 'http://localhost:8000')
+        # Scheduled restart interval, 0 disables it and leaves recovery to health events
+        self.restart_interval = float(os.environ.get('MT5_RESTART_INTERVAL_HOURS', 12)) * 3600
         self.health_check_interval = 5 * 60  # 5 minutes in seconds
-        self.last_restart = datetime.now()
+        # Monotonic so clock jumps (NTP, DST) can't skip or trigger scheduled restarts
+        self.last_restart = self._load_last_restart()
+        if self.last_restart is None:
+            self.last_restart = time.monotonic()
+        # Earliest retry of a failed scheduled restart, see _retry_scheduled_restart_later
+        self._restart_retry_at = 0
+        self._restart_lock = threading.RLock()
+        self._stop = threading.Event()
+        # Lets signal handlers and other threads wake the monitor loop
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._probe_socket = None
+        self._probe_connected_at = 0
+        # (monotonic timestamp, state) from the last container inspect
+        self._state_cache = (0, None)
+        
+        # Created on the first notification, see _http_session
+        self._http = None
+        # Single worker keeps notifications in order without blocking the monitor
+        self._notify_pool = ThreadPoolExecutor(max_workers=1)
         self.running_in_docker = is_running_in_docker()
+        self.docker = DockerAPI()
+        self.container_path = f"/containers/{urllib.parse.quote(self.container_name)}"
         
         # Check if Docker socket is available
         self.docker_available = self._check_docker_availability()
@@ -71,44 +230,20 @@ class MT5ContainerManager:
         else:
             logging.info("Running on host system")
         
-        self.docker_command_prefix = "docker"
-        
     def _check_docker_availability(self):
         """Check if Docker is available and accessible"""
         try:
-            success, stdout, stderr = self.run_command("docker version --format '{{.Server.Version}}'")
-            if success and stdout.strip():
-                logging.info(f"Docker server available, version: {stdout.strip()}")
+            status, data = self.docker.get('/_ping')
+            if status == 200 and data == 'OK':
+                logging.info("Docker server available")
                 return True
             else:
-                logging.warning(f"Docker not available: {stderr}")
+                logging.warning(f"Docker not available: {docker_error(data)}")
                 return False
         except Exception as e:
             logging.warning(f"Error checking Docker availability: {str(e)}")
             return False
         
-    def run_command(self, command, capture_output=True):
-        """Run a shell command and return the result"""
-        try:
-            if capture_output:
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                return result.returncode == 0, result.stdout, result.stderr
-            else:
-                result = subprocess.run(command, shell=True, timeout=30)
-                return result.returncode == 0, "", ""
-        except subprocess.TimeoutExpired:
-            logging.error(f"Command timed out: {command}")
-            return False, "", "Command timed out"
-        except Exception as e:
-            logging.error(f"Error running command '{command}': {str(e)}")
-            return False, "", str(e)
-
     def is_container_running(self):
         """Check if the MT5 container is running"""
         if not self.docker_available:
@@ -116,23 +251,49 @@ class MT5ContainerManager:
             return False
             
         try:
-            success, stdout, stderr = self.run_command(
-                f"{self.docker_command_prefix} ps --filter name={self.container_name} --format '{{{{.Names}}}}'"
-            )
-            
-            if success:
-                running_containers = stdout.strip().split('\n')
-                is_running = self.container_name in running_containers
-                logging.debug(f"Container {self.container_name} running: {is_running}")
-                return is_running
-            else:
-                logging.error(f"Error checking container status: {stderr}")
-                return False
+            is_running = self._get_state()['running']
+            logging.debug(f"Container {self.container_name} running: {is_running}")
+            return is_running
                 
         except Exception as e:
             logging.error(f"Error checking if container is running: {str(e)}")
             return False
 
+    def _get_state(self, max_age=2.0):
+        """Return the container's exists/running/health state, reusing a recent inspect result"""
+        cached_at, state = self._state_cache
+        if state is not None and time.monotonic() - cached_at < max_age:
+            return state
+        
+        status, data = self.docker.get(f"{self.container_path}/json")
+        if status == 200:
+            state = {
+                'exists': True,
+                'running': data['State']['Running'],
+                'health': data['State'].get('Health', {}).get('Status'),
+                'pid': data['State']['Pid'],
+                'restart_policy': data['HostConfig']['RestartPolicy']['Name'],
+                'started_at': parse_docker_time(data['State']['StartedAt'])
+            }
+        elif status == 404:
+            state = {
+                'exists': False,
+                'running': False,
+                'health': None,
+                'pid': 0,
+                'restart_policy': None,
+                'started_at': None
+            }
+        else:
+            raise RuntimeError(f"Error checking container status: {docker_error(data)}")
+        
+        self._state_cache = (time.monotonic(), state)
+        return state
+
+    def _invalidate_state(self):
+        """Drop the cached container state after anything that may have changed it"""
+        self._state_cache = (0, None)
+
     def start_container(self):
         """Start the MT5 container"""
         if not self.docker_available:
@@ -144,18 +305,27 @@ class MT5ContainerManager:
                 logging.info("MT5 container is already running")
                 return True
             
+            if not self._get_state()['exists']:
+                # Only create the container when it really doesn't exist yet
+                logging.warning("MT5 container does not exist")
+                return self._create_and_run_container()
+            
             logging.info("Starting MT5 container...")
             
             # First try to start existing container
-            success, stdout, stderr = self.run_command(f"{self.docker_command_prefix} start {self.container_name}")
+            status, data = self.docker.post(f"{self.container_path}/start")
+            self._invalidate_state()
             
-            if success:
+            if status in (204, 304):
                 logging.info("MT5 container started successfully")
                 return True
-            else:
-                logging.warning(f"Failed to start existing container: {stderr}")
-                # Container might not exist, try to create and run it
+            elif status == 404:
+                # Removed since the state was cached
+                logging.warning("MT5 container does not exist")
                 return self._create_and_run_container()
+            else:
+                logging.error(f"Failed to start existing container: {docker_error(data)}")
+                return False
                 
         except Exception as e:
             logging.error(f"Error starting MT5 container: {str(e)}")
@@ -166,58 +336,81 @@ class MT5ContainerManager:
         try:
             logging.info("Creating new MT5 container...")
             
-            # Remove any existing stopped container with the same name
-            self.run_command(f"{self.docker_command_prefix} rm -f {self.container_name}")
+            # Remove any existing container with the same name (force stops it first)
+            status, data = self.docker.delete(self.container_path, params={'force': 1, 'v': 1})
+            self._invalidate_state()
+            if status not in (204, 404):
+                logging.error(f"Failed to remove existing container: {docker_error(data)}")
+                return False
             
-            # Run new container (this should match the docker-compose configuration)
-            run_command = f"""
-            {self.docker_command_prefix} run -d \
-                --name {self.container_name} \
-                -p 3001:3000 \
-                -p 8002:8001 \
-                -e CUSTOM_USER={os.environ.get('MT5_VNC_USER', 'admin')} \
-                -e PASSWORD={os.environ.get('MT5_VNC_PASSWORD', 'admin')} \
-                -v $(pwd)/mt5_data:/config \
-                --restart unless-stopped \
-                {self.mt5_image}
-            """.strip().replace('\n', ' ').replace('\\', '')
+            # Create new container (this should match the docker-compose configuration)
+            container_spec = {
+                'Image': self.mt5_image,
+                'Env': [
+                    f"CUSTOM_USER={os.environ.get('MT5_VNC_USER', 'admin')}",
+                    f"PASSWORD={os.environ.get('MT5_VNC_PASSWORD', 'admin')}"
+                ],
+                'ExposedPorts': {'3000/tcp': {}, '8001/tcp': {}},
+                'HostConfig': {
+                    'PortBindings': {
+                        '3000/tcp': [{'HostPort': '3001'}],
+                        '8001/tcp': [{'HostPort': '8002'}]
+                    },
+                    'Binds': [f"{self.mt5_data_path}:/config"],
+                    'RestartPolicy': {'Name': 'unless-stopped'}
+                },
+                'Healthcheck': {
+                    'Test': ['CMD-SHELL', "bash -c '</dev/tcp/localhost/8001' || exit 1"],
+                    'Interval': 30 * 10**9,
+                    'Timeout': 5 * 10**9,
+                    'Retries': 3,
+                    'StartPeriod': 60 * 10**9
+                }
+            }
+            create_params = {'name': self.container_name}
             
-            success, stdout, stderr = self.run_command(run_command)
+            status, data = self.docker.post('/containers/create', params=create_params, body=container_spec)
+            if status == 404:
+                # docker run pulls missing images implicitly, the API doesn't
+                if not self._pull_image():
+                    return False
+                status, data = self.docker.post('/containers/create', params=create_params, body=container_spec)
             
-            if success:
+            if status != 201:
+                logging.error(f"Failed to create container: {docker_error(data)}")
+                return False
+            
+            status, data = self.docker.post(f"/containers/{data['Id']}/start")
+            self._invalidate_state()
+            
+            if status in (204, 304):
                 logging.info("MT5 container created and started successfully")
                 return True
             else:
-                logging.error(f"Failed to create container: {stderr}")
+                logging.error(f"Failed to start created container: {docker_error(data)}")
                 return False
                 
         except Exception as e:
             logging.error(f"Error creating MT5 container: {str(e)}")
             return False
 
-    def stop_container(self):
-        """Stop the MT5 container"""
-        if not self.docker_available:
-            logging.error("Docker not available - cannot stop container")
-            return False
-            
-        try:
-            if not self.is_container_running():
-                logging.info("MT5 container is not running")
-                return True
-            
-            logging.info("Stopping MT5 container...")
-            success, stdout, stderr = self.run_command(f"{self.docker_command_prefix} stop {self.container_name}")
-            
-            if success:
-                logging.info("MT5 container stopped successfully")
-                return True
-            else:
-                logging.error(f"Failed to stop container: {stderr}")
-                return False
-                
-        except Exception as e:
-            logging.error(f"Error stopping MT5 container: {str(e)}")
+    def _pull_image(self):
+        """Pull the MT5 image"""
+        repository, tag = self.mt5_image, 'latest'
+        if ':' in self.mt5_image.rsplit('/', 1)[-1]:
+            repository, tag = self.mt5_image.rsplit(':', 1)
+        
+        logging.info(f"Pulling MT5 image {repository}:{tag}...")
+        status, data = self.docker.post('/images/create', params={'fromImage': repository, 'tag': tag})
+        
+        # Pull failures arrive as error messages in a 200 progress stream
+        messages = data if isinstance(data, list) else [data]
+        errors = [message['error'] for message in messages if isinstance(message, dict) and 'error' in message]
+        
+        if status == 200 and not errors:
+            return True
+        else:
+            logging.error(f"Failed to pull MT5 image: {errors[-1] if errors else docker_error(data)}")
             return False
 
     def restart_container(self):
@@ -226,80 +419,78 @@ class MT5ContainerManager:
             logging.error("Docker not available - cannot restart container")
             return False
             
-        try:
-            logging.info("Restarting MT5 container...")
+        # Serialize restarts triggered by the events stream and the restart timer
+        with self._restart_lock:
+            try:
+                logging.info("Restarting MT5 container...")
             
-            # Use docker restart command first (simpler and faster)
-            success, stdout, stderr = self.run_command(f"{self.docker_command_prefix} restart {self.container_name}")
+                # Restart in place through the API; the daemon keeps the container config
+                # Only 2s between SIGTERM and SIGKILL: MT5 keeps no state worth a graceful shutdown
+                # and we usually restart because it is stuck, so waiting longer just extends the outage
+                status, data = self.docker.post(f"{self.container_path}/restart", params={'t': 2})
+                self._invalidate_state()
             
-            if success:
-                logging.info("MT5 container restarted successfully using docker restart")
+                if status == 204:
+                    logging.info("MT5 container restarted successfully using docker restart")
+                elif status == 404:
+                    logging.warning("MT5 container not found, creating it")
+                    if not self.start_container():
+                        return False
+                else:
+                    # A manual stop/start would hit the same daemon problem; the unless-stopped
+                    # restart policy and the events watcher recover the container instead
+                    logging.error(f"Docker restart failed: {docker_error(data)}")
+                    return False
+                
                 # Wait for container to be ready
-                time.sleep(30)
+                self.wait_for_container_ready()
                 # Notify trading engine about restart
                 self.notify_restart()
-                self.last_restart = datetime.now()
+                self._mark_restarted()
                 return True
-            else:
-                logging.warning(f"Docker restart failed: {stderr}. Trying manual stop/start...")
-                # Fallback to manual stop/start
-                return self._manual_restart()
-            
-        except Exception as e:
-            logging.error(f"Error restarting MT5 container: {str(e)}")
-            return False
-
-    def _manual_restart(self):
-        """Manual restart by stopping and starting container"""
-        try:
-            # Stop container
-            if not self.stop_container():
-                logging.error("Failed to stop container during manual restart")
-                return False
             
-            # Wait a moment
-            time.sleep(5)
-            
-            # Start container
-            if not self.start_container():
-                logging.error("Failed to start container during manual restart")
+            except Exception as e:
+                logging.error(f"Error restarting MT5 container: {str(e)}")
                 return False
-            
-            # Wait for container to be ready
-            time.sleep(30)
-            
-            # Notify trading engine about restart
-            self.notify_restart()
-            self.last_restart = datetime.now()
-            
-            logging.info("MT5 container restarted successfully using manual restart")
-            return True
-            
-        except Exception as e:
-            logging.error(f"Error during manual restart: {str(e)}")
-            return False
 
-    def restart_container_direct(self):
-        """Restart the MT5 container using direct docker command"""
-        return self.restart_container()  # Use the improved restart method
-            
     def notify_restart(self):
-        """Notify the trading engine about MT5 restart"""
-        try:
-            # Get trading engine URL from environment or default to localhost
-            trading_engine_url = os.environ.get('TRADING_ENGINE_URL', 'http://localhost:8000')
-            
-            notification_data = {
-                'timestamp': datetime.now().isoformat(),
-                'message': 'MT5 container restarted'
-            }
+        """Notify the trading engine about MT5 restart in the background"""
+        notification_data = {
+            'timestamp': datetime.now().isoformat(),
+            'message': 'MT5 container restarted'
+        }
+        
+        # Send notification to trading engine
+        future = self._notify_pool.submit(self._send_restart_notification, notification_data)
+        future.add_done_callback(self._log_notification_result)
+
+    def _send_restart_notification(self, notification_data):
+        """POST a restart notification to the trading engine, run on the notification thread"""
+        # Creating the session here keeps import or setup errors out of the restart itself
+        return self._http_session().post(
+            f'{self.trading_engine_url}/api/mt5-restart-notification',
+            json=notification_data,
+            timeout=5
+        )
+
+    def _http_session(self):
+        """Return the trading engine HTTP session, importing requests on first use"""
+        if self._http is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
             
-            # Send notification to trading engine
-            response = requests.post(
-                f'{trading_engine_url}/api/mt5-restart-notification',
-                json=notification_data,
-                timeout=10
-            )
+            # Keep the connection to the trading engine open between notifications
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=Retry(total=2, backoff_factor=0.1))
+            self._http = requests.Session()
+            self._http.mount('http://', adapter)
+            self._http.mount('https://', adapter)
+        return self._http
+
+    def _log_notification_result(self, future):
+        """Log the outcome of a restart notification"""
+        try:
+            response = future.result()
             
             if response.status_code == 200:
                 logging.info("Successfully notified trading engine about MT5 restart")
@@ -312,35 +503,59 @@ class MT5ContainerManager:
     def wait_for_container_ready(self, max_wait_seconds=60):
         """Wait for MT5 container to be ready"""
         logging.info("Waiting for MT5 container to be ready...")
-        start_time = time.time()
+        # A connection from before the restart says nothing about the new process, so reconnect
+        self._close_probe_socket()
+        deadline = time.monotonic() + max_wait_seconds
+        poll_interval = 0.25
         
-        while (time.time() - start_time) < max_wait_seconds:
-            if self.health_check():
-                logging.info("MT5 container is ready")
-                return True
-            time.sleep(5)
+        selector = selectors.DefaultSelector()
+        pidfd = self._open_container_pidfd()
+        if pidfd is not None:
+            # The pidfd becomes readable when the container's main process exits
+            selector.register(pidfd, selectors.EVENT_READ)
+        
+        try:
+            while True:
+                self._invalidate_state()
+                state = self._get_state()
+                if state['health'] is not None:
+                    ready = state['health'] == 'healthy'
+                else:
+                    ready = state['running'] and self._probe_mt5_port()
+                
+                if ready:
+                    logging.info("MT5 container is ready")
+                    return True
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                
+                if pidfd is None:
+                    time.sleep(min(poll_interval, remaining))
+                elif selector.select(min(poll_interval, remaining)):
+                    logging.error("MT5 container exited while waiting for it to be ready")
+                    return False
+        finally:
+            selector.close()
+            if pidfd is not None:
+                os.close(pidfd)
         
         logging.error("MT5 container failed to become ready within timeout")
         return False
 
-    def notify_trading_engine_restart(self):
-        """Notify trading engine about MT5 restart"""
+    def _open_container_pidfd(self):
+        """Open a pidfd for the container's main process, or None where that isn't possible"""
+        # Inside a container State.Pid refers to the host's PID namespace, not ours
+        if self.running_in_docker or not hasattr(os, 'pidfd_open'):
+            return None
+        
         try:
-            # Call trading engine endpoint to reinitialize connections
-            trading_engine_url = os.environ.get('TRADING_ENGINE_URL', 'http://localhost:8000')
-            response = requests.post(
-                f"{trading_engine_url}/api/mt5-restart-notification",
-                json={'timestamp': datetime.now().isoformat()},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logging.info("Trading engine notified of MT5 restart")
-            else:
-                logging.warning(f"Failed to notify trading engine: {response.status_code}")
-                
-        except Exception as e:
-            logging.error(f"Error notifying trading engine: {str(e)}")
+            pid = self._get_state()['pid']
+            return os.pidfd_open(pid) if pid else None
+        except OSError:
+            # Kernels before 5.3 have no pidfd_open
+            return None
 
     def health_check(self):
         """Run health check on MT5 container"""
@@ -349,13 +564,22 @@ class MT5ContainerManager:
             return False
         
         try:
-            # Check if port is accessible
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            result = sock.connect_ex((self.mt5_host, int(self.mt5_port)))
-            sock.close()
+            # Prefer the result of the container's own HEALTHCHECK
+            health = self._get_state()['health']
+            if health is not None:
+                if health == 'healthy':
+                    logging.debug("MT5 health check passed")
+                    return True
+                elif health == 'starting':
+                    # Still in its start period, not a failure worth restarting over
+                    logging.info("MT5 container is still starting")
+                    return True
+                else:
+                    logging.warning(f"MT5 container health status: {health}")
+                    return False
             
-            if result == 0:
+            # No HEALTHCHECK configured, check if port is accessible
+            if self._probe_mt5_port():
                 logging.debug("MT5 health check passed")
                 return True
             else:
@@ -366,62 +590,302 @@ class MT5ContainerManager:
             logging.error(f"Health check error: {str(e)}")
             return False
 
-    def monitor_loop(self):
-        """Main monitoring loop"""
-        while True:
+    def _probe_mt5_port(self):
+        """Check the MT5 port, reusing a recent connection and reconnecting once it has aged or dropped"""
+        # An old idle connection says nothing about whether MT5 still accepts new ones
+        probe_age = time.monotonic() - self._probe_connected_at
+        if self._probe_socket is not None and probe_age > self.health_check_interval / 2:
+            self._close_probe_socket()
+        
+        if self._probe_socket is not None:
             try:
-                current_time = datetime.now()
-                
-                # Check for scheduled restart (every 12 hours)
-                if (current_time - self.last_restart).total_seconds() >= self.restart_interval:
-                    logging.info("Scheduled restart time reached")
-                    self.restart_container_direct()
-                    self.last_restart = current_time
-                
-                # Perform health check
-                elif not self.health_check():
-                    logging.warning("Health check failed, restarting container")
-                    self.restart_container_direct()
-                    self.last_restart = current_time
+                # Nothing to read means the connection is still open, an empty read means the peer closed it
+                if self._probe_socket.recv(1, socket.MSG_PEEK):
+                    return True
+            except BlockingIOError:
+                return True
+            except OSError:
+                pass
+            self._close_probe_socket()
+        
+        try:
+            sock = socket.create_connection((self.mt5_host, int(self.mt5_port)), timeout=5)
+        except OSError:
+            return False
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setblocking(False)
+        self._probe_socket = sock
+        self._probe_connected_at = time.monotonic()
+        return True
+
+    def _close_probe_socket(self):
+        """Drop the cached MT5 port connection so the next probe connects afresh"""
+        if self._probe_socket is not None:
+            self._probe_socket.close()
+            self._probe_socket = None
+
+    def _mark_restarted(self):
+        """Record a restart and share its time with other manager processes"""
+        self.last_restart = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+            with open(f"{STATE_FILE}.lock", 'w') as lock_file:
+                # Serialize writers; os.replace keeps readers from seeing a partial file
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                with open(f"{STATE_FILE}.tmp", 'w') as f:
+                    json.dump({'last_restart': datetime.now().astimezone().isoformat()}, f)
+                os.replace(f"{STATE_FILE}.tmp", STATE_FILE)
+        except OSError as e:
+            logging.warning(f"Could not save manager state: {str(e)}")
+
+    def _load_last_restart(self):
+        """Return the last recorded restart on this process's monotonic clock, or None"""
+        try:
+            with open(STATE_FILE) as f:
+                saved = datetime.fromisoformat(json.load(f)['last_restart'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        # Stored as wall-clock time because monotonic values don't survive a reboot
+        return self._to_monotonic(saved)
+
+    def _to_monotonic(self, moment):
+        """Convert a wall-clock datetime in the past to this process's monotonic clock"""
+        age = max(0, time.time() - moment.timestamp())
+        return time.monotonic() - age
+
+    def _scheduled_restart_check(self):
+        """Restart the container if the restart interval has passed since it last (re)started"""
+        # Restarts by other manager processes (e.g. --restart-now), the daemon or compose all count
+        candidates = [self._load_last_restart()]
+        if self.docker_available:
+            try:
+                # A single fresh inspect gives running state, health and StartedAt together
+                self._invalidate_state()
+                started_at = self._get_state()['started_at']
+                if started_at is not None:
+                    candidates.append(self._to_monotonic(started_at))
+            except Exception as e:
+                logging.error(f"Could not inspect MT5 container, using the last known restart time: {str(e)}")
+        for restarted in candidates:
+            if restarted is not None and restarted > self.last_restart:
+                self.last_restart = restarted
+
+        if time.monotonic() >= self._next_scheduled_restart():
+            logging.info("Scheduled restart time reached")
+            if not self.restart_container():
+                self._retry_scheduled_restart_later()
+
+    def _next_scheduled_restart(self):
+        """Return when the next scheduled restart is due, on the monotonic clock"""
+        return max(self.last_restart + self.restart_interval, self._restart_retry_at)
+
+    def _retry_scheduled_restart_later(self):
+        """Hold off the next scheduled restart attempt after a failure"""
+        # Kept in this process only: a failed restart must not count as one for other manager runs
+        self._restart_retry_at = time.monotonic() + self.health_check_interval
+        logging.warning(f"Scheduled restart failed, retrying in {self.health_check_interval} seconds")
+
+    def _check_unmonitored_health(self):
+        """Health check a running container that has no HEALTHCHECK to emit health events"""
+        if not self.docker_available:
+            return
+        
+        self._invalidate_state()
+        state = self._get_state()
+        # With a HEALTHCHECK the events stream reports problems; a stopped container is left
+        # to the die handling and its restart policy
+        if not state['running'] or state['health'] is not None:
+            return
+        
+        if not self.health_check():
+            logging.warning("Health check failed, restarting container")
+            self.restart_container()
+
+    def _handle_container_event(self, event):
+        """React to a die or health_status event for the MT5 container"""
+        # The daemon's container filter also matches names starting with ours (mt5_user_staging)
+        if event.get('Actor', {}).get('Attributes', {}).get('name') != self.container_name:
+            return
+        
+        action = event.get('Action') or event.get('status', '')
+        self._invalidate_state()
+        
+        if action == 'health_status: unhealthy':
+            # Events replayed after a reconnect may already be stale
+            if self._get_state()['health'] != 'unhealthy':
+                logging.debug("MT5 container is no longer unhealthy, ignoring health event")
+                return
+            logging.warning("MT5 container reported unhealthy, restarting container")
+            self.restart_container()
+        elif action == 'die':
+            if self._get_state()['restart_policy'] in ('always', 'unless-stopped'):
+                # The daemon brings the container back itself (and leaves it down after a manual stop)
+                logging.info("MT5 container exited, leaving recovery to its Docker restart policy")
+                return
+            with self._restart_lock:
+                # Our own restarts emit die too; by the time we hold the lock they have completed
+                if self.is_container_running():
+                    logging.debug("MT5 container is running again, ignoring die event")
+                    return
+                logging.warning("MT5 container exited, restarting container")
+                self.restart_container()
+
+    def _watch_events(self):
+        """Follow the Docker events stream, falling back to health checks while it stays down"""
+        event_filters = {
+            'type': ['container'],
+            'container': [self.container_name],
+            'event': ['die', 'health_status']
+        }
+        # Resume from the last event seen so nothing is lost while reconnecting
+        since = f"{time.time():.9f}"
+        failures = 0
+        
+        while not self._stop.is_set():
+            connected_at = time.monotonic()
+            try:
+                logging.info("Watching Docker events for the MT5 container")
+                for event in self.docker.events(filters=event_filters, since=since):
+                    if 'timeNano' in event:
+                        # Integer maths: a float can't hold today's epoch to the nanosecond
+                        ns = event['timeNano'] + 1
+                        since = f"{ns // 10**9}.{ns % 10**9:09d}"
+                    try:
+                        self._handle_container_event(event)
+                    except Exception as e:
+                        # A failed inspect while handling one event must not drop the stream
+                        logging.error(f"Error handling Docker event: {str(e)}")
+                logging.warning("Docker events stream closed")
+            except Exception as e:
+                logging.error(f"Docker events stream disconnected: {str(e)}")
+            
+            # A stream that stayed up for a while counts as a fresh start
+            if time.monotonic() - connected_at > EVENTS_MAX_BACKOFF:
+                failures = 0
+            failures += 1
+            
+            if failures > EVENTS_PROBE_AFTER:
+                try:
+                    # The stream keeps failing, check the container directly until it is back
+                    if not self.health_check():
+                        logging.warning("Health check failed, restarting container")
+                        self.restart_container()
+                except Exception as e:
+                    logging.error(f"Error in monitoring loop: {str(e)}")
+            
+            # Reconnect straight away the first time, then back off up to EVENTS_MAX_BACKOFF
+            self._stop.wait(min(2 ** (failures - 1) - 1, EVENTS_MAX_BACKOFF))
+
+    def monitor_loop(self):
+        """Main monitoring loop driven by Docker container events"""
+        threading.Thread(target=self._watch_events, name='docker-events', daemon=True).start()
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_recv, selectors.EVENT_READ)
+        
+        next_health_check = time.monotonic() + self.health_check_interval
+        try:
+            while not self._stop.is_set():
+                # Block until woken up, the next health check or the next scheduled restart is due
+                deadline = next_health_check
+                if self.restart_interval:
+                    deadline = min(deadline, self._next_scheduled_restart())
+                if selector.select(max(0, deadline - time.monotonic())):
+                    commands = self._wake_recv.recv(64)
+                    if WAKE_STOP in commands:
+                        break
+                    if WAKE_RESTART in commands:
+                        self.restart_now()
+                    continue
                 
-                # Wait before next check
-                time.sleep(self.health_check_interval)
+                if time.monotonic() >= next_health_check:
+                    next_health_check = time.monotonic() + self.health_check_interval
+                    try:
+                        self._check_unmonitored_health()
+                    except Exception as e:
+                        logging.error(f"Error in monitoring loop: {str(e)}")
                 
-            except KeyboardInterrupt:
-                logging.info("Monitoring stopped by user")
-                break
-            except Exception as e:
-                logging.error(f"Error in monitoring loop: {str(e)}")
-                time.sleep(60)  # Wait a minute before retrying
+                if self.restart_interval and time.monotonic() >= self._next_scheduled_restart():
+                    try:
+                        self._scheduled_restart_check()
+                    except Exception as e:
+                        logging.error(f"Error in monitoring loop: {str(e)}")
+                        self._retry_scheduled_restart_later()
+        finally:
+            self._stop.set()
+            selector.close()
+            # Let a restart that is already under way finish before exiting
+            with self._restart_lock:
+                logging.info("Monitoring stopped")
+
+    def _wake(self, command):
+        """Send a command to the monitoring loop"""
+        try:
+            self._wake_send.send(command)
+        except BlockingIOError:
+            # The loop already has unread commands pending and will wake up anyway
+            pass
+
+    def stop(self):
+        """Stop the monitoring loop"""
+        self._stop.set()
+        self._wake(WAKE_STOP)
+
+    def request_restart(self):
+        """Ask the monitoring loop to restart the container now"""
+        self._wake(WAKE_RESTART)
 
     def restart_now(self):
         """Force restart container now"""
         logging.info("Force restart requested")
-        self.restart_container_direct()
-        return True
+        return self.restart_container()
+
+    def close(self):
+        """Wait for pending notifications and release open connections"""
+        self._notify_pool.shutdown(wait=True)
+        if self._http is not None:
+            self._http.close()
+        self._close_probe_socket()
+        self._wake_recv.close()
+        self._wake_send.close()
 
 def main():
     """Main entry point"""
+    import argparse
+    
     parser = argparse.ArgumentParser(description='MT5 Container Manager')
     parser.add_argument('--restart-now', action='store_true', help='Restart container immediately and exit')
-    parser.add_argument('--daemon', action='store_true', help='Run as daemon with scheduled restarts')
+    parser.add_argument('--daemon', action='store_true', help='Run as daemon with event-driven recovery and scheduled restarts')
     parser.add_argument('--health-check', action='store_true', help='Run single health check and exit')
     
     args = parser.parse_args()
     
-    manager = MT5ContainerManager()
-    
-    if args.restart_now:
-        success = manager.restart_now()
-        sys.exit(0 if success else 1)
-    elif args.health_check:
-        healthy = manager.health_check()
-        print(f"Health check: {'PASSED' if healthy else 'FAILED'}")
-        sys.exit(0 if healthy else 1)
-    elif args.daemon:
-        manager.monitor_loop()
-    else:
-        print("Use --daemon to run as service, --restart-now for immediate restart, or --health-check for health check")
+    # Only the long-running daemon writes to the log file
+    log_listener = _configure_logging(logfile=LOG_FILE if args.daemon else None)
+    manager = None
+    try:
+        manager = MT5ContainerManager()
+        
+        if args.restart_now:
+            success = manager.restart_now()
+            sys.exit(0 if success else 1)
+        elif args.health_check:
+            healthy = manager.health_check()
+            print(f"Health check: {'PASSED' if healthy else 'FAILED'}")
+            sys.exit(0 if healthy else 1)
+        elif args.daemon:
+            # Stop promptly on SIGTERM (docker/systemctl stop) and Ctrl+C
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: manager.stop())
+            # SIGUSR1 restarts the container from the running daemon
+            signal.signal(signal.SIGUSR1, lambda *_: manager.request_restart())
+            manager.monitor_loop()
+        else:
+            print("Use --daemon to run as service, --restart-now for immediate restart, or --health-check for health check")
+    finally:
+        if manager is not None:
+            manager.close()
+        # Flush any queued log records before exiting
+        log_listener.stop()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -24,7 +24,7 @@ echo "Starting Novak Trading Engine with Gunicorn"
 echo "=============================================="
 echo "Environment: $FLASK_ENV"
 echo "Debug Mode: $FLASK_DEBUG"
-echo "Workers: $GUNICORN_WORKERS"
+echo "Workers: up to $GUNICORN_WORKERS (capped by CPU count and available memory)"
 echo "Port: $PORT"
 echo "Log Level: $LOG_LEVEL"
 echo "=============================================="
@@ -33,11 +33,8 @@ echo "=============================================="
 exec gunicorn \
     --config gunicorn.conf.py \
     --bind 0.0.0.0:$PORT \
-    --workers $GUNICORN_WORKERS \
     --timeout 120 \
     --log-level $LOG_LEVEL \
-    --access-logfile logs/gunicorn_access.log \
-    --error-logfile logs/gunicorn_error.log \
     --capture-output \
     --preload \
     wsgi:app 
\ No newline at end of file
@@ -11,4 +11,24 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from src.app import app
 
 if __name__ == "__main__":
-    app.run() 
\ No newline at end of file
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        # Flask development server, only for local use
+        app.run()
+    else:
+        # Serve through gunicorn with the production config (gthread workers), overriding the
+        # settings that assume the /app container layout so this also works on a local checkout
+        import tempfile
+
+        here = os.path.dirname(os.path.abspath(__file__))
+        sys.argv = [
+            sys.argv[0],
+            "--chdir", here,
+            "--config", os.path.join(here, "gunicorn.conf.py"),
+            "--bind", f"127.0.0.1:{os.environ.get('PORT', '8000')}",
+            "--pid", os.path.join(tempfile.gettempdir(), "novak-gunicorn.pid"),
+            "--worker-tmp-dir", tempfile.gettempdir(),
+            "wsgi:app"
+        ]
+        run()
\ No newline at end of file